@@ -12,9 +12,17 @@ All rights reserved.
 
 from __future__ import annotations
 
+import atexit
+import functools
 import logging
+import os
+import re
 import subprocess
 import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
 
 from mcp.server.fastmcp import FastMCP
@@ -30,12 +38,49 @@ logger = logging.getLogger(__name__)
 # Initialize FastMCP server
 mcp = FastMCP("code-reviewer")
 
+# Shared stdin for git subprocesses, opened once instead of per spawn
+_DEVNULL = open(os.devnull, "rb")
+
 # Default persona file locations (checked in order)
 DEFAULT_PERSONA_PATHS = [
     "personas/example_persona.md",  # In MCP server directory
     "notebooks/code_reviewer_persona.md",  # In project root (backward compatibility)
 ]
 
+# Timeout for a single git command
+GIT_COMMAND_TIMEOUT_SECONDS = 60
+
+# Diff output caps; anything beyond is cut off with a truncation marker
+MAX_DIFF_BYTES = 3 * 1024 * 1024
+MAX_DIFF_LINES = 50_000
+DIFF_READ_CHUNK_BYTES = 64 * 1024
+
+# Diffs above either size are parsed header-only (file names, no hunks)
+MAX_FULL_PARSE_BYTES = 500_000
+MAX_FULL_PARSE_LINES = 5000
+
+# Files above this size are truncated before review
+MAX_REVIEW_FILE_BYTES = 2_000_000
+
+# Files above this size are sent without inline line numbers
+MAX_NUMBERED_FILE_BYTES = 200_000
+
+# Line-number prefixes are precomputed for this many lines
+PRECOMPUTED_LINE_PREFIXES = 10_000
+
+# Buffer and chunk size for writing report files
+REPORT_WRITE_CHUNK_BYTES = 1 << 20
+
+# Above this many added + deleted lines a diff is summarized instead of fetched
+MAX_DIFF_CHANGED_LINES = 10_000
+
+# Above this much command-line text, diffs use the glob filter instead of listing
+# paths; about half of Windows' 32K command-line limit, leaving room for the rest
+MAX_PATHSPEC_CHARS = 16 * 1024
+
+# Seconds a cached branch name stays valid (short, so a checkout is noticed quickly)
+BRANCH_CACHE_TTL_SECONDS = 2.0
+
 # ============================================================================
 # CODE REVIEWER PERSONA (Embedded)
 # ============================================================================
@@ -112,11 +157,136 @@ code quality and establishing team standards. Be thorough and educational.
 - "No relative paths, always specify absolute path for imports"
 """
 
+# Verbatim callout phrases from the persona's "Common Callouts" section
+_CALLOUTS = tuple(
+    re.findall(r'"([^"]+)"', REVIEWER_PERSONA.split("## Common Callouts", 1)[1])
+)
+
+# All callouts compiled into one alternation so text is scanned in a single pass
+_CALLOUT_PATTERNS = re.compile(
+    "|".join(re.escape(phrase) for phrase in _CALLOUTS),
+    re.IGNORECASE,
+)
+
+# "   1 | " style prefixes for review_file, so the common case skips formatting
+_LINE_PREFIXES: tuple[bytes, ...] = tuple(
+    b"%4d | " % i for i in range(1, PRECOMPUTED_LINE_PREFIXES + 1)
+)
+
+# ============================================================================
+# PROMPT TEMPLATES
+# ============================================================================
+
+# Fragments are joined with str.join so each response is built in one allocation
+
+_DIFF_PROMPT_HEADER = """
+## Code Review Request
+
+Please review the following diff using these standards:
+
+"""
+
+_DIFF_PROMPT_FOCUS = """
+
+### Focus Areas: """
+
+_DIFF_PROMPT_DIFF = """
+
+### Diff to Review:
+
+"""
+
+_DIFF_PROMPT_FOOTER = """
+
+---
+
+## Review Output Format
+
+For each issue found, provide:
+1. **File:Line** - The specific location
+2. **Severity** - critical/warning/suggestion/question
+3. **Issue** - What the problem is
+4. **Suggestion** - How to fix it (with code example if helpful)
+
+Organize by file, then by severity within each file.
+"""
+
+_FILE_PROMPT_HEADER = """
+## Code Review Request - Single File
+
+Please review this file using these standards:
+
+"""
+
+_FILE_PROMPT_FILE = """
+
+### File: `"""
+
+_FILE_PROMPT_CODE = """`
+
+"""
+
+_FILE_PROMPT_FOOTER = """
+```
+
+---
+
+## Review Output Format
+
+For each issue found, provide:
+1. **Line Number** - The specific line(s)
+2. **Severity** - critical/warning/suggestion/question  
+3. **Issue** - What the problem is
+4. **Suggestion** - How to fix it (with code example if helpful)
+
+Start with a brief summary of the file's purpose, then list issues by severity.
+"""
+
+_REPORT_STANDARDS = """
+
+---
+
+## Review Standards
+
+"""
+
+_REPORT_DIFF = """
+
+---
+
+## Diff to Review
+
+"""
+
+_REPORT_CHECKLIST = """
+
+---
+
+## Review Checklist
+
+"""
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
 
+@functools.lru_cache(maxsize=16)
+def _read_persona_cached(abs_path: str, mtime_ns: int) -> str:
+    """Read a persona file, memoized by path and modification time.
+    
+    Args:
+        abs_path: Absolute path to the persona file.
+        mtime_ns: File modification time; a new value invalidates the entry.
+    
+    Returns:
+        The persona content as a string.
+    """
+    content = Path(abs_path).read_text(encoding="utf-8")
+    logger.info(f"Loaded persona from: {abs_path}")
+    return content
+
+
 def load_persona(
     persona_file: str | None = None,
     working_directory: str | None = None,
@@ -162,9 +332,8 @@ def load_persona(
             file_path = Path(working_directory) / file_path
         
         try:
-            content = file_path.read_text(encoding="utf-8")
-            logger.info(f"Loaded persona from: {file_path}")
-            return content
+            abs_path = os.path.abspath(file_path)
+            return _read_persona_cached(abs_path, os.stat(abs_path).st_mtime_ns)
         except FileNotFoundError:
             logger.warning(f"Persona file not found: {file_path}, using embedded default")
         except Exception as e:
@@ -174,29 +343,289 @@ def load_persona(
     return REVIEWER_PERSONA
 
 
-def run_git_command(args: list[str], cwd: str | None = None) -> tuple[str, str, int]:
-    """Run a git command and return stdout, stderr, and return code.
+def run_git_command(args: list[str], cwd: str | None = None) -> tuple[bytes, bytes, int]:
+    """Run a git command and return raw stdout, stderr, and return code.
+    
+    Output is left undecoded so callers only pay for decoding what they use.
     
     Args:
         args: Git command arguments (without 'git' prefix).
         cwd: Working directory for the command.
     
     Returns:
-        Tuple of (stdout, stderr, return_code).
+        Tuple of (stdout, stderr, return_code) as bytes.
     """
     try:
-        result = subprocess.run(
-            ["git"] + args,
-            capture_output=True,
-            text=True,
+        # close_fds=False spares the child from closing every inherited fd
+        # before exec; our own fds are non-inheritable by default (PEP 446)
+        proc = subprocess.Popen(
+            ["git", *args],
+            stdin=_DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             cwd=cwd,
-            timeout=60,
+            close_fds=False,
         )
-        return result.stdout, result.stderr, result.returncode
+    except OSError as e:
+        return b"", str(e).encode("utf-8"), 1
+    
+    try:
+        stdout, stderr = proc.communicate(timeout=GIT_COMMAND_TIMEOUT_SECONDS)
     except subprocess.TimeoutExpired:
-        return "", "Command timed out", 1
-    except Exception as e:
+        proc.kill()
+        proc.communicate()
+        return b"", b"Command timed out", 1
+    return stdout, stderr, proc.returncode
+
+
+def run_git_text(args: list[str], cwd: str | None = None) -> tuple[str, str, int]:
+    """Run a git command with small output and return it decoded.
+    
+    Args:
+        args: Git command arguments (without 'git' prefix).
+        cwd: Working directory for the command.
+    
+    Returns:
+        Tuple of (stdout, stderr, return_code).
+    """
+    stdout, stderr, code = run_git_command(args, cwd=cwd)
+    return (
+        stdout.decode("utf-8", errors="replace"),
+        stderr.decode("utf-8", errors="replace"),
+        code,
+    )
+
+
+def run_git_command_streaming(
+    args: list[str],
+    cwd: str | None = None,
+    max_bytes: int = MAX_DIFF_BYTES,
+    max_lines: int = MAX_DIFF_LINES,
+) -> tuple[str, str, int]:
+    """Run a git command, reading stdout in chunks up to a size cap.
+    
+    Intended for commands with potentially huge output such as `git diff`.
+    Once either cap is exceeded the process is terminated and the output ends
+    with a truncation marker instead of being buffered in full.
+    
+    Args:
+        args: Git command arguments (without 'git' prefix).
+        cwd: Working directory for the command.
+        max_bytes: Maximum number of stdout bytes to keep.
+        max_lines: Maximum number of stdout lines to keep.
+    
+    Returns:
+        Tuple of (stdout, stderr, return_code).
+    """
+    try:
+        proc = subprocess.Popen(
+            ["git", *args],
+            stdin=_DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            bufsize=1024 * 1024,
+            close_fds=False,
+        )
+    except OSError as e:
         return "", str(e), 1
+    
+    timer = threading.Timer(GIT_COMMAND_TIMEOUT_SECONDS, proc.kill)
+    timer.start()
+    buf = bytearray()
+    line_count = 0
+    truncated = False
+    try:
+        while True:
+            chunk = proc.stdout.read(DIFF_READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            buf += chunk
+            line_count += chunk.count(b"\n")
+            if len(buf) > max_bytes or line_count > max_lines:
+                truncated = True
+                proc.terminate()
+                break
+        stderr = proc.stderr.read()
+        proc.wait()
+    finally:
+        timer.cancel()
+        proc.stdout.close()
+        proc.stderr.close()
+    
+    if truncated:
+        # Cut back to the last complete line within both caps
+        end = len(buf)
+        if line_count > max_lines:
+            end = 0
+            for _ in range(max_lines):
+                end = buf.index(b"\n", end) + 1
+        limit = min(end, max_bytes)
+        end = buf.rfind(b"\n", 0, limit) + 1
+        if end == 0:
+            # No line break within the cap (e.g. minified content), so cut mid-line
+            end = limit
+        kept_lines = buf.count(b"\n", 0, end)
+        marker = f"\n... [diff truncated at {kept_lines} lines / {end} bytes] ...\n"
+        return buf[:end].decode("utf-8", errors="replace") + marker, "", 0
+    
+    if proc.returncode < 0:
+        return "", "Command timed out", 1
+    return (
+        buf.decode("utf-8", errors="replace"),
+        stderr.decode("utf-8", errors="replace"),
+        proc.returncode,
+    )
+
+
+class GitContextError(Exception):
+    """Raised when the git state for a review cannot be resolved."""
+
+
+class _GitSession:
+    """Long-lived `git cat-file --batch-check` co-process for one repository.
+    
+    Resolving revisions through a single persistent process avoids paying a
+    fork/exec per lookup for the lifetime of the server. Merge bases are
+    memoized by commit SHA pair, since the merge base of two commits never
+    changes.
+    """
+
+    def __init__(self, repo_root: str) -> None:
+        self.repo_root = repo_root
+        self._proc: subprocess.Popen | None = None
+        self._lock = threading.Lock()
+        self._merge_bases: dict[tuple[str, str], str] = {}
+
+    def _ensure_proc(self) -> subprocess.Popen:
+        """Start the cat-file process if it is not running."""
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                ["git", "cat-file", "--batch-check=%(objectname) %(objecttype)"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                cwd=self.repo_root,
+                text=True,
+                bufsize=1,
+            )
+        return self._proc
+
+    def resolve(self, rev: str) -> str | None:
+        """Resolve a revision to its object SHA.
+        
+        Args:
+            rev: Any revision git understands (branch, tag, SHA, HEAD).
+        
+        Returns:
+            The object SHA, or None if the revision does not exist.
+        """
+        if not rev or "\n" in rev:
+            return None
+        with self._lock:
+            try:
+                proc = self._ensure_proc()
+                proc.stdin.write(rev + "\n")
+                proc.stdin.flush()
+                line = proc.stdout.readline()
+            except OSError as e:
+                logger.warning(f"git cat-file session failed: {e}")
+                self.close()
+                return None
+        parts = line.split()
+        if len(parts) != 2 or parts[1] in ("missing", "ambiguous"):
+            return None
+        return parts[0]
+
+    def merge_base(self, base: str, head: str = "HEAD") -> str | None:
+        """Get the merge base of two revisions, memoized by commit SHA.
+        
+        Args:
+            base: The base revision.
+            head: The head revision.
+        
+        Returns:
+            The merge base SHA, or None if the revisions share no history.
+        
+        Raises:
+            GitContextError: If a revision does not exist or git fails.
+        """
+        base_sha = self.resolve(base)
+        head_sha = self.resolve(head)
+        for rev, sha in ((base, base_sha), (head, head_sha)):
+            if not sha:
+                # Same wording as `git merge-base` for an unknown revision
+                raise GitContextError(
+                    f"Error finding merge base: fatal: Not a valid object name {rev}"
+                )
+        return self.merge_base_of_shas(base_sha, head_sha)
+
+    def merge_base_of_shas(self, base_sha: str, head_sha: str) -> str | None:
+        """Get the merge base of two already-resolved commit SHAs.
+        
+        Args:
+            base_sha: The base commit SHA.
+            head_sha: The head commit SHA.
+        
+        Returns:
+            The merge base SHA, or None if the commits share no history.
+        
+        Raises:
+            GitContextError: If git fails for any other reason.
+        """
+        key = (base_sha, head_sha)
+        if key not in self._merge_bases:
+            stdout, stderr, code = run_git_text(
+                ["merge-base", base_sha, head_sha],
+                cwd=self.repo_root,
+            )
+            if code != 0:
+                # No common ancestor exits 1 without output; anything else is an error
+                if stderr.strip():
+                    raise GitContextError(f"Error finding merge base: {stderr.strip()}")
+                return None
+            self._merge_bases[key] = stdout.strip()
+        return self._merge_bases[key]
+
+    def close(self) -> None:
+        """Terminate the cat-file process."""
+        if self._proc is not None:
+            if self._proc.poll() is None:
+                self._proc.stdin.close()
+                self._proc.wait()
+            self._proc = None
+
+
+# Repository roots keyed by working directory
+_REPO_ROOT_CACHE: dict[str, str | None] = {}
+
+# (monotonic timestamp, branch name) keyed by working directory
+_BRANCH_CACHE: dict[str, tuple[float, str | None]] = {}
+
+# Git sessions keyed by repository root
+_GIT_SESSIONS: dict[str, _GitSession] = {}
+
+
+def _get_git_session(repo_root: str) -> _GitSession:
+    """Get or lazily create the git session for a repository.
+    
+    Args:
+        repo_root: Repository root directory.
+    
+    Returns:
+        The cached session for that repository.
+    """
+    session = _GIT_SESSIONS.get(repo_root)
+    if session is None:
+        session = _GIT_SESSIONS[repo_root] = _GitSession(repo_root)
+    return session
+
+
+@atexit.register
+def _close_git_sessions() -> None:
+    """Shut down all git co-processes on interpreter exit."""
+    for session in _GIT_SESSIONS.values():
+        session.close()
 
 
 def get_repo_root(cwd: str | None = None) -> str | None:
@@ -208,10 +637,14 @@ def get_repo_root(cwd: str | None = None) -> str | None:
     Returns:
         Path to repository root, or None if not in a git repo.
     """
-    stdout, _, code = run_git_command(["rev-parse", "--show-toplevel"], cwd=cwd)
-    if code == 0:
-        return stdout.strip()
-    return None
+    key = cwd or os.getcwd()
+    if key not in _REPO_ROOT_CACHE:
+        stdout, _, code = run_git_text(["rev-parse", "--show-toplevel"], cwd=cwd)
+        if code == 0:
+            _REPO_ROOT_CACHE[key] = stdout.strip()
+        else:
+            _REPO_ROOT_CACHE[key] = None
+    return _REPO_ROOT_CACHE[key]
 
 
 def get_current_branch(cwd: str | None = None) -> str | None:
@@ -223,62 +656,662 @@ def get_current_branch(cwd: str | None = None) -> str | None:
     Returns:
         Current branch name, or None if not in a git repo.
     """
-    stdout, _, code = run_git_command(["branch", "--show-current"], cwd=cwd)
+    key = cwd or os.getcwd()
+    cached = _BRANCH_CACHE.get(key)
+    if cached and time.monotonic() - cached[0] < BRANCH_CACHE_TTL_SECONDS:
+        return cached[1]
+    
+    stdout, _, code = run_git_text(["branch", "--show-current"], cwd=cwd)
+    branch = None
     if code == 0:
-        return stdout.strip()
-    return None
+        branch = stdout.strip()
+    _BRANCH_CACHE[key] = (time.monotonic(), branch)
+    return branch
+
+
+def _invalidate_git_caches(cwd: str | None = None) -> None:
+    """Drop cached repo root and branch for a working directory.
+    
+    Call this from any tool that changes the checked-out branch.
+    
+    Args:
+        cwd: Working directory whose entries should be dropped.
+    """
+    key = cwd or os.getcwd()
+    _REPO_ROOT_CACHE.pop(key, None)
+    _BRANCH_CACHE.pop(key, None)
+
+
+@dataclass
+class ReviewContext:
+    """Git state resolved once per review and shared by the tools."""
+
+    repo_root: str
+    current_branch: str
+    merge_base: str
+
+
+@dataclass(slots=True)
+class DiffResult:
+    """Structured result of a branch diff, so callers can branch on `ok`."""
+
+    ok: bool
+    error: str | None
+    current_branch: str
+    base_branch: str
+    merge_base: str
+    file_filter: str
+    patch: str
+    files_changed: int = 0
+    insertions: int = 0
+    deletions: int = 0
+    too_large: bool = False
+
+
+@dataclass
+class FileStat:
+    """Per-file line counts from `git diff --numstat`."""
+
+    path: str
+    added: int | None  # None for binary files
+    deleted: int | None
+    old_path: str | None = None  # Set for renames and copies
+
+
+@dataclass
+class _RevParseBundle:
+    """Everything a single `git rev-parse` call tells us about a review."""
+
+    repo_root: str
+    current_branch: str
+    base_sha: str
+    head_sha: str
+
+
+def _rev_parse_bundle(cwd: str, base_branch: str) -> _RevParseBundle:
+    """Resolve repo root, base and head SHAs and branch in one rev-parse call.
+    
+    Args:
+        cwd: Working directory inside the repository.
+        base_branch: The base branch to resolve.
+    
+    Returns:
+        The parsed rev-parse output.
+    
+    Raises:
+        GitContextError: If not in a git repo or the base branch is unknown.
+    """
+    # --abbrev-ref only applies to the revisions after it, so the SHAs come first
+    stdout, stderr, code = run_git_text(
+        ["rev-parse", "--show-toplevel", base_branch, "HEAD", "--abbrev-ref", "HEAD"],
+        cwd=cwd,
+    )
+    lines = stdout.strip().split("\n")
+    if code == 0 and len(lines) == 4:
+        repo_root, base_sha, head_sha, current_branch = lines
+        # Detached HEAD abbreviates to "HEAD"; store "" like `git branch --show-current`
+        # so the shared branch cache means the same thing whichever path filled it
+        if current_branch == "HEAD":
+            current_branch = ""
+        return _RevParseBundle(repo_root, current_branch, base_sha, head_sha)
+    
+    if not lines[0]:
+        raise GitContextError(
+            "Error: Not in a git repository or unable to determine current branch."
+        )
+    # Keep only git's first line; rev-parse appends usage hints after it
+    detail = stderr.strip().split("\n", 1)[0] or f"unknown revision '{base_branch}'"
+    raise GitContextError(f"Error finding merge base: {detail}")
+
+
+def _resolve_context(cwd: str, base_branch: str) -> ReviewContext:
+    """Resolve repo root, current branch and merge base.
+    
+    Repo root and branch come from the per-directory caches when fresh,
+    otherwise from a single rev-parse call that also yields the commit SHAs
+    and refreshes both caches. Either way at most one merge-base process is
+    spawned, and none once the SHA pair has been seen before.
+    
+    Args:
+        cwd: Working directory inside the repository.
+        base_branch: The base branch to compute the merge base against.
+    
+    Returns:
+        The resolved review context.
+    
+    Raises:
+        GitContextError: If not in a git repo or the merge base cannot be found.
+    """
+    repo_root = _REPO_ROOT_CACHE.get(cwd)
+    cached_branch = _BRANCH_CACHE.get(cwd)
+    if (
+        repo_root
+        and cached_branch
+        and cached_branch[1]
+        and time.monotonic() - cached_branch[0] < BRANCH_CACHE_TTL_SECONDS
+    ):
+        return ReviewContext(
+            repo_root, cached_branch[1], _find_merge_base(repo_root, base_branch)
+        )
+    
+    bundle = _rev_parse_bundle(cwd, base_branch)
+    _REPO_ROOT_CACHE[cwd] = bundle.repo_root
+    _BRANCH_CACHE[cwd] = (time.monotonic(), bundle.current_branch)
+    merge_base = _get_git_session(bundle.repo_root).merge_base_of_shas(
+        bundle.base_sha, bundle.head_sha
+    )
+    if not merge_base:
+        raise GitContextError(
+            f"Error finding merge base: no common ancestor for '{base_branch}' and HEAD"
+        )
+    return ReviewContext(bundle.repo_root, bundle.current_branch, merge_base)
+
+
+def _require_repo_root(cwd: str) -> str:
+    """Get the repository root, failing outside a git repository.
+    
+    Args:
+        cwd: Working directory inside the repository.
+    
+    Returns:
+        Path to the repository root.
+    
+    Raises:
+        GitContextError: If cwd is not inside a git repository.
+    """
+    repo_root = get_repo_root(cwd)
+    if not repo_root:
+        raise GitContextError(
+            "Error: Not in a git repository or unable to determine current branch."
+        )
+    return repo_root
+
+
+def _find_merge_base(repo_root: str, base_branch: str) -> str:
+    """Find the merge base of a base branch and HEAD via the git session.
+    
+    Args:
+        repo_root: Repository root directory.
+        base_branch: The base branch to compare against.
+    
+    Returns:
+        The merge base commit SHA.
+    
+    Raises:
+        GitContextError: If the base branch does not exist or has no common
+            ancestor with HEAD.
+    """
+    merge_base = _get_git_session(repo_root).merge_base(base_branch, "HEAD")
+    if not merge_base:
+        raise GitContextError(
+            f"Error finding merge base: no common ancestor for '{base_branch}' and HEAD"
+        )
+    return merge_base
+
+
+def _diff_pathspec(files: list[str], file_filter: str) -> list[str]:
+    """Build the pathspec for a diff limited to already-known changed files.
+    
+    Args:
+        files: Changed file paths (both sides of any rename).
+        file_filter: Glob used when the file list would make the command line too long.
+    
+    Returns:
+        Pathspec arguments to pass after `--`.
+    """
+    pathspec = [f":(top,literal){f}" for f in files]
+    # +3 per entry for the separating space and the quotes Windows may add
+    if sum(len(spec) + 3 for spec in pathspec) > MAX_PATHSPEC_CHARS:
+        return [file_filter]
+    return pathspec
+
+
+def _diff_numstat(merge_base: str, cwd: str, file_filter: str) -> list[FileStat]:
+    """Get per-file line counts with a single `git diff --numstat` call.
+    
+    Args:
+        merge_base: Merge base commit SHA.
+        cwd: Working directory inside the repository.
+        file_filter: File pattern to filter.
+    
+    Returns:
+        One entry per changed file, in git's order.
+    
+    Raises:
+        GitContextError: If git fails to compute the stats.
+    """
+    stdout, stderr, code = run_git_text(
+        ["diff", "--numstat", "-z", merge_base, "HEAD", "--", file_filter],
+        cwd=cwd,
+    )
+    if code != 0:
+        raise GitContextError(f"Error getting changed files: {stderr}")
+    
+    # -z output: "added\tdeleted\tpath\0", or "added\tdeleted\t\0old\0new\0" for renames
+    stats: list[FileStat] = []
+    tokens = iter(stdout.split("\0"))
+    for token in tokens:
+        if not token:
+            continue
+        added, deleted, path = token.split("\t", 2)
+        old_path = None
+        if not path:
+            old_path = next(tokens, "")
+            path = next(tokens, "")
+        stats.append(FileStat(
+            path=path,
+            added=int(added) if added != "-" else None,
+            deleted=int(deleted) if deleted != "-" else None,
+            old_path=old_path,
+        ))
+    return stats
+
+
+def _format_changed_files(stats: list[FileStat]) -> str:
+    """Render the changed-files section shared by tools and reports.
+    
+    Args:
+        stats: Per-file line counts from `_diff_numstat`.
+    
+    Returns:
+        Markdown summary of the changed files.
+    """
+    file_list = "- `" + "`\n- `".join([stat.path for stat in stats]) + "`"
+    
+    rows = []
+    total_added = 0
+    total_deleted = 0
+    for stat in stats:
+        if stat.added is None:
+            rows.append(f"| `{stat.path}` | binary | binary |")
+            continue
+        rows.append(f"| `{stat.path}` | {stat.added} | {stat.deleted} |")
+        total_added += stat.added
+        total_deleted += stat.deleted
+    table = "\n".join(rows)
+    
+    return f"""## Changed Files ({len(stats)} files)
+
+### Files:
+{file_list}
+
+### Statistics:
+| File | Added | Deleted |
+|------|------:|--------:|
+{table}
+
+**Total:** +{total_added} / -{total_deleted}
+"""
+
+
+def _format_branch_diff(
+    current_branch: str,
+    base_branch: str,
+    merge_base: str,
+    file_filter: str,
+    patch: str,
+) -> str:
+    """Render the branch diff section shared by tools and reports.
+    
+    Args:
+        current_branch: Name of the branch under review.
+        base_branch: The base branch compared against.
+        merge_base: Merge base commit SHA.
+        file_filter: File pattern the diff was filtered with.
+        patch: Raw unified diff.
+    
+    Returns:
+        Markdown summary header followed by the diff.
+    """
+    return f"""## Branch Diff Summary
+
+**Current Branch:** {current_branch}
+**Base Branch:** {base_branch}
+**Merge Base:** {merge_base[:8]}
+**Filter:** {file_filter}
+
+---
+
+{patch}
+"""
+
 
+@dataclass
+class _DiffParseState:
+    """Mutable state threaded through the diff line handlers."""
 
-def parse_diff_to_files(diff_output: str) -> dict[str, list[dict]]:
+    files: dict[str, list[dict]]
+    current_file: str | None = None
+    current_hunk: dict | None = None
+
+
+def _on_diff_header(state: _DiffParseState, line: bytes) -> None:
+    """Start a new file on a `diff --git` header line."""
+    if not line.startswith(b"diff --git "):
+        return
+    # Extract filename from diff header
+    parts = line.split(b" b/")
+    if len(parts) >= 2:
+        state.current_file = parts[-1].decode("utf-8", errors="replace")
+        state.files[state.current_file] = []
+        # File metadata and ---/+++ lines follow, so no hunk is open
+        state.current_hunk = None
+
+
+def _on_hunk(state: _DiffParseState, line: bytes) -> None:
+    """Open a new hunk on a `@@ -start,count +start,count @@` line."""
+    if state.current_file is None or not line.startswith(b"@@"):
+        return
+    try:
+        parts = line.split(b"@@")[1].split()
+        new_range = parts[1] if len(parts) > 1 else b"+0"
+        new_start = int(new_range.split(b",")[0].lstrip(b"+"))
+    except (ValueError, IndexError):
+        return
+    state.current_hunk = {
+        "start_line": new_start,
+        "header": line.decode("utf-8", errors="replace"),
+        "additions": [],
+        "deletions": [],
+        "context": [],
+    }
+    state.files[state.current_file].append(state.current_hunk)
+
+
+def _on_add(state: _DiffParseState, line: bytes) -> None:
+    """Record an added line in the open hunk."""
+    if state.current_hunk is not None:
+        state.current_hunk["additions"].append(line[1:])
+
+
+def _on_del(state: _DiffParseState, line: bytes) -> None:
+    """Record a deleted line in the open hunk."""
+    if state.current_hunk is not None:
+        state.current_hunk["deletions"].append(line[1:])
+
+
+def _on_ctx(state: _DiffParseState, line: bytes) -> None:
+    """Record a context line in the open hunk."""
+    if state.current_hunk is not None:
+        state.current_hunk["context"].append(line)
+
+
+# Line handlers keyed by the first byte of a diff line; other lines are ignored
+_DIFF_DISPATCH = {
+    ord("d"): _on_diff_header,
+    ord("@"): _on_hunk,
+    ord("+"): _on_add,
+    ord("-"): _on_del,
+    ord(" "): _on_ctx,
+}
+
+
+_DIFF_HEADER_RE = re.compile(rb"^diff --git .* b/(.*)$", re.MULTILINE)
+
+
+def _has_any_diff_hunks(diff_output: str) -> bool:
+    """Check whether diff output contains at least one file diff.
+    
+    Args:
+        diff_output: Raw or formatted git diff output.
+    
+    Returns:
+        True if a `diff --git` header is present.
+    """
+    return diff_output.find("diff --git") != -1
+
+
+def _branch_diff(
+    base_branch: str,
+    file_filter: str,
+    cwd: str,
+    merge_base: str | None = None,
+    current_branch: str | None = None,
+    stats: list[FileStat] | None = None,
+) -> DiffResult:
+    """Compute the diff between the current branch and a base branch.
+    
+    Args:
+        base_branch: The base branch to compare against.
+        file_filter: File pattern to filter.
+        cwd: Working directory inside the repository.
+        merge_base: Pre-resolved merge base commit; looked up when omitted.
+        current_branch: Pre-resolved branch name; looked up when omitted.
+        stats: Pre-computed numstat for merge_base; computed when omitted.
+    
+    Returns:
+        The diff result; `patch` is empty when nothing changed.
+    """
+    result = DiffResult(
+        ok=False,
+        error=None,
+        current_branch="",
+        base_branch=base_branch,
+        merge_base=merge_base or "",
+        file_filter=file_filter,
+        patch="",
+    )
+    
+    # Get current branch info
+    if not current_branch:
+        current_branch = get_current_branch(cwd)
+    if not current_branch:
+        result.error = "Error: Not in a git repository or unable to determine current branch."
+        return result
+    result.current_branch = current_branch
+    
+    try:
+        # Get the merge base to find where branches diverged
+        if not result.merge_base:
+            result.merge_base = _find_merge_base(_require_repo_root(cwd), base_branch)
+        # Cheap numstat probe for the file list and size before fetching the patch
+        if stats is None:
+            stats = _diff_numstat(result.merge_base, cwd, file_filter)
+    except GitContextError as e:
+        result.error = str(e)
+        return result
+    
+    result.ok = True
+    if not stats:
+        return result
+    
+    result.files_changed = len(stats)
+    result.insertions = sum(stat.added or 0 for stat in stats)
+    result.deletions = sum(stat.deleted or 0 for stat in stats)
+    if result.insertions + result.deletions > MAX_DIFF_CHANGED_LINES:
+        result.too_large = True
+        return result
+    
+    files = [stat.path for stat in stats]
+    files += [stat.old_path for stat in stats if stat.old_path]
+    
+    # Get the diff from merge base to HEAD for the changed files only
+    stdout, stderr, code = run_git_command_streaming(
+        ["diff", result.merge_base, "HEAD", "--", *_diff_pathspec(files, file_filter)],
+        cwd=cwd,
+    )
+    if code != 0:
+        result.ok = False
+        result.error = f"Error getting diff: {stderr}"
+        return result
+    
+    if stdout.strip():
+        result.patch = stdout
+    return result
+
+
+def _render_diff_result(result: DiffResult) -> str:
+    """Render a diff result the way the `get_branch_diff` tool reports it.
+    
+    Args:
+        result: Result from `_branch_diff`.
+    
+    Returns:
+        The error message, a "No changes found" message, a size summary for
+        oversized diffs, or the formatted diff.
+    """
+    if not result.ok:
+        return result.error or "Error getting diff."
+    if result.too_large:
+        return f"""## Branch Diff Summary
+
+**Current Branch:** {result.current_branch}
+**Base Branch:** {result.base_branch}
+**Merge Base:** {result.merge_base[:8]}
+**Filter:** {result.file_filter}
+
+Diff too large to include: {result.files_changed} files changed, {result.insertions} insertions(+), {result.deletions} deletions(-) (limit: {MAX_DIFF_CHANGED_LINES} changed lines).
+Run `get_changed_files` for details, or review individual files with `review_file`.
+"""
+    if not result.patch:
+        return f"No changes found in {result.file_filter} files between {result.base_branch} and {result.current_branch}."
+    return _format_branch_diff(
+        result.current_branch,
+        result.base_branch,
+        result.merge_base,
+        result.file_filter,
+        result.patch,
+    )
+
+
+def _get_branch_diff(
+    cwd: str,
+    merge_base: str,
+    file_filter: str,
+    base_branch: str,
+    current_branch: str | None = None,
+    stats: list[FileStat] | None = None,
+) -> str:
+    """Render the branch diff for an already-resolved merge base.
+    
+    Args:
+        cwd: Working directory inside the repository.
+        merge_base: Merge base commit SHA.
+        file_filter: File pattern to filter.
+        base_branch: The base branch compared against.
+        current_branch: Pre-resolved branch name; looked up when omitted.
+        stats: Pre-computed numstat for merge_base; computed when omitted.
+    
+    Returns:
+        The formatted diff, a "No changes found" message, or an error.
+    """
+    return _render_diff_result(
+        _branch_diff(base_branch, file_filter, cwd, merge_base, current_branch, stats)
+    )
+
+
+def _render_changed_files(stats: list[FileStat], file_filter: str) -> str:
+    """Render the changed-files section from numstat results.
+    
+    Args:
+        stats: Per-file stats from `_diff_numstat`.
+        file_filter: File pattern the stats were filtered by.
+    
+    Returns:
+        The formatted file list with statistics, or a message if none changed.
+    """
+    if not stats:
+        return f"No {file_filter} files changed."
+    return _format_changed_files(stats)
+
+
+def _get_changed_files(cwd: str, merge_base: str, file_filter: str) -> str:
+    """Render the changed-files section for an already-resolved merge base.
+    
+    Args:
+        cwd: Working directory inside the repository.
+        merge_base: Merge base commit SHA.
+        file_filter: File pattern to filter.
+    
+    Returns:
+        The formatted file list with statistics, or a message if none changed.
+    """
+    # Changed files and their stats come from a single numstat call
+    try:
+        stats = _diff_numstat(merge_base, cwd, file_filter)
+    except GitContextError as e:
+        return str(e)
+    
+    return _render_changed_files(stats, file_filter)
+
+
+def parse_diff_to_files(diff_output: str | bytes) -> dict[str, list[dict]]:
     """Parse git diff output into structured file changes.
     
+    Single pass over the raw bytes, dispatching on the first byte of each
+    line. Hunk lines are kept as undecoded `bytes`; decode them when rendering.
+    Diffs larger than MAX_FULL_PARSE_BYTES or MAX_FULL_PARSE_LINES are only
+    scanned for file headers, and every file maps to an empty hunk list.
+    
     Args:
         diff_output: Raw git diff output.
     
     Returns:
         Dictionary mapping file paths to list of change hunks.
     """
-    files: dict[str, list[dict]] = {}
-    current_file = None
-    current_hunk = None
-    
-    for line in diff_output.split("\n"):
-        if line.startswith("diff --git"):
-            # Extract filename from diff header
-            parts = line.split(" b/")
-            if len(parts) >= 2:
-                current_file = parts[-1]
-                files[current_file] = []
-        elif line.startswith("@@") and current_file:
-            # Parse hunk header for line numbers
-            # Format: @@ -start,count +start,count @@
-            try:
-                hunk_info = line.split("@@")[1].strip()
-                parts = hunk_info.split()
-                old_range = parts[0] if parts else "-0"
-                new_range = parts[1] if len(parts) > 1 else "+0"
-                
-                new_start = int(new_range.split(",")[0].replace("+", ""))
-                
-                current_hunk = {
-                    "start_line": new_start,
-                    "header": line,
-                    "additions": [],
-                    "deletions": [],
-                    "context": [],
-                }
-                files[current_file].append(current_hunk)
-            except (ValueError, IndexError):
-                pass
-        elif current_hunk is not None:
-            if line.startswith("+") and not line.startswith("+++"):
-                current_hunk["additions"].append(line[1:])
-            elif line.startswith("-") and not line.startswith("---"):
-                current_hunk["deletions"].append(line[1:])
-            elif not line.startswith("\\"):
-                current_hunk["context"].append(line)
-    
-    return files
+    data = diff_output
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    
+    if len(data) > MAX_FULL_PARSE_BYTES or data.count(b"\n") > MAX_FULL_PARSE_LINES:
+        return {
+            match.group(1).decode("utf-8", errors="replace"): []
+            for match in _DIFF_HEADER_RE.finditer(data)
+        }
+    
+    state = _DiffParseState(files={})
+    dispatch = _DIFF_DISPATCH
+    start = 0
+    size = len(data)
+    while start < size:
+        end = data.find(b"\n", start)
+        if end == -1:
+            end = size
+        if end > start:
+            handler = dispatch.get(data[start])
+            if handler is not None:
+                handler(state, data[start:end])
+        start = end + 1
+    
+    return state.files
+
+
+def _scan_callouts(text: str) -> list[tuple[int, str]]:
+    """Find persona callout phrases in text with a single regex scan.
+    
+    Args:
+        text: Text to scan, e.g. a diff or review output.
+    
+    Returns:
+        List of (offset, matched phrase) in order of appearance.
+    """
+    return [(match.start(), match.group(0)) for match in _CALLOUT_PATTERNS.finditer(text)]
+
+
+def _write_atomic(output_file: str, payload: bytes) -> None:
+    """Write bytes to a file via a temp file and `os.replace`.
+    
+    Readers never see a partially written file, even if the process is
+    killed mid-write.
+    
+    Args:
+        output_file: Destination path.
+        payload: Encoded file content.
+    
+    Raises:
+        OSError: If the file cannot be written or replaced.
+    """
+    tmp_file = output_file + ".tmp"
+    try:
+        with open(tmp_file, "wb", buffering=REPORT_WRITE_CHUNK_BYTES) as f:
+            view = memoryview(payload)
+            for offset in range(0, len(view), REPORT_WRITE_CHUNK_BYTES):
+                f.write(view[offset:offset + REPORT_WRITE_CHUNK_BYTES])
+        os.replace(tmp_file, output_file)
+    except OSError:
+        if os.path.exists(tmp_file):
+            os.unlink(tmp_file)
+        raise
 
 
 def format_review_comment(
@@ -336,46 +1369,7 @@ def get_branch_diff(
         The git diff output showing changes on the current branch.
     """
     cwd = working_directory or str(Path.cwd())
-    
-    # Get current branch info
-    current_branch = get_current_branch(cwd)
-    if not current_branch:
-        return "Error: Not in a git repository or unable to determine current branch."
-    
-    # Get the merge base to find where branches diverged
-    stdout, stderr, code = run_git_command(
-        ["merge-base", base_branch, "HEAD"],
-        cwd=cwd,
-    )
-    if code != 0:
-        return f"Error finding merge base: {stderr}"
-    
-    merge_base = stdout.strip()
-    
-    # Get the diff from merge base to HEAD for Python files
-    stdout, stderr, code = run_git_command(
-        ["diff", merge_base, "HEAD", "--", file_filter],
-        cwd=cwd,
-    )
-    if code != 0:
-        return f"Error getting diff: {stderr}"
-    
-    if not stdout.strip():
-        return f"No changes found in {file_filter} files between {base_branch} and {current_branch}."
-    
-    # Add summary header
-    summary = f"""## Branch Diff Summary
-
-**Current Branch:** {current_branch}
-**Base Branch:** {base_branch}
-**Merge Base:** {merge_base[:8]}
-**Filter:** {file_filter}
-
----
-
-{stdout}
-"""
-    return summary
+    return _render_diff_result(_branch_diff(base_branch, file_filter, cwd))
 
 
 @mcp.tool()
@@ -397,44 +1391,12 @@ def get_changed_files(
     cwd = working_directory or str(Path.cwd())
     
     # Get merge base
-    stdout, stderr, code = run_git_command(
-        ["merge-base", base_branch, "HEAD"],
-        cwd=cwd,
-    )
-    if code != 0:
-        return f"Error finding merge base: {stderr}"
-    
-    merge_base = stdout.strip()
-    
-    # Get changed files with stats
-    stdout, stderr, code = run_git_command(
-        ["diff", "--stat", "--name-only", merge_base, "HEAD", "--", file_filter],
-        cwd=cwd,
-    )
-    if code != 0:
-        return f"Error getting changed files: {stderr}"
-    
-    if not stdout.strip():
-        return f"No {file_filter} files changed."
-    
-    files = [f.strip() for f in stdout.strip().split("\n") if f.strip()]
-    
-    # Get detailed stats
-    stdout_stat, _, _ = run_git_command(
-        ["diff", "--stat", merge_base, "HEAD", "--", file_filter],
-        cwd=cwd,
-    )
+    try:
+        merge_base = _find_merge_base(_require_repo_root(cwd), base_branch)
+    except GitContextError as e:
+        return str(e)
     
-    return f"""## Changed Files ({len(files)} files)
-
-### Files:
-{chr(10).join(f'- `{f}`' for f in files)}
-
-### Statistics:
-```
-{stdout_stat}
-```
-"""
+    return _get_changed_files(cwd, merge_base, file_filter)
 
 
 @mcp.tool()
@@ -467,44 +1429,26 @@ def review_diff(
     persona = load_persona(persona_file, cwd)
     
     # Get the diff
-    diff_result = get_branch_diff(base_branch, "*.py", cwd)
-    if diff_result.startswith("Error") or "No changes found" in diff_result:
-        return diff_result
-    
-    # Parse the diff into files
-    files = parse_diff_to_files(diff_result)
+    result = _branch_diff(base_branch, "*.py", cwd)
+    if not result.ok or not result.patch:
+        return _render_diff_result(result)
     
-    if not files:
+    # Only presence matters here, so skip parsing the diff
+    if not _has_any_diff_hunks(result.patch):
         return "No files to review in the diff."
     
-    # Build review context
-    review_prompt = f"""
-## Code Review Request
-
-Please review the following diff using these standards:
-
-{persona}
-
-### Focus Areas: {focus_areas}
-
-### Diff to Review:
-
-{diff_result}
-
----
-
-## Review Output Format
-
-For each issue found, provide:
-1. **File:Line** - The specific location
-2. **Severity** - critical/warning/suggestion/question
-3. **Issue** - What the problem is
-4. **Suggestion** - How to fix it (with code example if helpful)
-
-Organize by file, then by severity within each file.
-"""
+    diff_result = _render_diff_result(result)
     
-    return review_prompt
+    # Build review context
+    return "".join([
+        _DIFF_PROMPT_HEADER,
+        persona,
+        _DIFF_PROMPT_FOCUS,
+        focus_areas,
+        _DIFF_PROMPT_DIFF,
+        diff_result,
+        _DIFF_PROMPT_FOOTER,
+    ])
 
 
 @mcp.tool()
@@ -535,46 +1479,47 @@ def review_file(
         file_path = str(Path(cwd) / file_path)
     
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
+        data = Path(file_path).read_bytes()
     except FileNotFoundError:
         return f"Error: File not found: {file_path}"
     except Exception as e:
         return f"Error reading file: {e}"
     
-    # Add line numbers
-    lines = content.split("\n")
-    numbered_content = "\n".join(
-        f"{i+1:4d} | {line}" for i, line in enumerate(lines)
-    )
-    
-    review_prompt = f"""
-## Code Review Request - Single File
-
-Please review this file using these standards:
-
-{persona}
-
-### File: `{file_path}`
-
-```python
-{numbered_content}
-```
-
----
-
-## Review Output Format
-
-For each issue found, provide:
-1. **Line Number** - The specific line(s)
-2. **Severity** - critical/warning/suggestion/question  
-3. **Issue** - What the problem is
-4. **Suggestion** - How to fix it (with code example if helpful)
-
-Start with a brief summary of the file's purpose, then list issues by severity.
-"""
-    
-    return review_prompt
+    file_note = ""
+    if len(data) > MAX_REVIEW_FILE_BYTES:
+        logger.warning(
+            f"{file_path} is {len(data)} bytes, truncating to {MAX_REVIEW_FILE_BYTES}"
+        )
+        # Cut at the last complete line, or mid-line if there is none (e.g. minified files)
+        end = data.rfind(b"\n", 0, MAX_REVIEW_FILE_BYTES) + 1
+        if end == 0:
+            end = MAX_REVIEW_FILE_BYTES
+        data = data[:end]
+        file_note = f"**Note:** File truncated to the first {len(data)} bytes.\n\n"
+    
+    if len(data) > MAX_NUMBERED_FILE_BYTES:
+        file_note += "**Note:** File too large for inline numbering.\n\n"
+        numbered_content = data.decode("utf-8", errors="replace")
+    else:
+        # Add line numbers, decoding once at the end
+        lines = data.splitlines()
+        if len(lines) <= len(_LINE_PREFIXES):
+            numbered = [prefix + line for prefix, line in zip(_LINE_PREFIXES, lines)]
+        else:
+            numbered = [b"%4d | %s" % (i, line) for i, line in enumerate(lines, 1)]
+        numbered_content = b"\n".join(numbered).decode("utf-8", errors="replace")
+    
+    return "".join([
+        _FILE_PROMPT_HEADER,
+        persona,
+        _FILE_PROMPT_FILE,
+        file_path,
+        _FILE_PROMPT_CODE,
+        file_note,
+        "```python\n",
+        numbered_content,
+        _FILE_PROMPT_FOOTER,
+    ])
 
 
 @mcp.tool()
@@ -695,56 +1640,56 @@ def generate_review_report(
         Path to the generated report file and a summary.
     """
     cwd = working_directory or str(Path.cwd())
-    repo_root = get_repo_root(cwd) or cwd
-    current_branch = get_current_branch(cwd) or "unknown"
+    file_filter = "*.py"
+    
+    try:
+        ctx = _resolve_context(cwd, base_branch)
+    except GitContextError as e:
+        return str(e)
     
     # Load the persona
     persona = load_persona(persona_file, cwd)
     
     # Default output path
     if not output_file:
-        output_file = str(Path(repo_root) / ".code_review.md")
+        output_file = str(Path(ctx.repo_root) / ".code_review.md")
     
-    # Get changed files
-    changed_files_output = get_changed_files(base_branch, "*.py", cwd)
-    
-    # Get diff
-    diff_output = get_branch_diff(base_branch, "*.py", cwd)
+    # Both sections share the merge base and branch resolved above, and one
+    # numstat call feeds the file list as well as the diff's size probe
+    stats = None
+    try:
+        stats = _diff_numstat(ctx.merge_base, cwd, file_filter)
+        changed_files_output = _render_changed_files(stats, file_filter)
+    except GitContextError as e:
+        changed_files_output = str(e)
+    diff_output = _get_branch_diff(
+        cwd, ctx.merge_base, file_filter, base_branch, ctx.current_branch, stats
+    )
     
     # Generate report content
-    report = f"""# Code Review Report
+    report = "".join([
+        f"""# Code Review Report
 
-**Branch:** {current_branch}
+**Branch:** {ctx.current_branch or 'unknown'}
 **Base:** {base_branch}
 **Persona:** {persona_file or 'default (embedded)'}
-**Generated:** {__import__('datetime').datetime.now().isoformat()}
-
----
-
-{changed_files_output}
-
----
-
-## Review Standards
-
-{persona}
+**Generated:** {datetime.now().isoformat()}
 
 ---
 
-## Diff to Review
-
-{diff_output}
-
----
-
-## Review Checklist
-
-{get_review_checklist()}
-"""
+""",
+        changed_files_output,
+        _REPORT_STANDARDS,
+        persona,
+        _REPORT_DIFF,
+        diff_output,
+        _REPORT_CHECKLIST,
+        get_review_checklist(),
+        "\n",
+    ])
     
     try:
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(report)
+        _write_atomic(output_file, report.encode("utf-8"))
         return f"Report generated successfully: `{output_file}`\n\nYou can now review the diff above and provide feedback following the persona standards."
     except Exception as e:
         return f"Error writing report: {e}\n\nReport content:\n{report[:2000]}..."
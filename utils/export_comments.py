@@ -1,5 +1,5 @@
 """
-Export Bitbucket PR comments to CSV.
+Export Bitbucket PR comments to CSV (or Parquet).
 
 This utility script helps export your code review comments from Bitbucket PRs
 for analysis or to build training data for code review personas.
@@ -26,15 +26,20 @@ To find your account ID:
 """
 
 import argparse
+import asyncio
+import contextlib
 import csv
+import math
 import os
 import sys
 import time
-from typing import Any
+from datetime import datetime
+from typing import Any, Callable, Iterator
+from urllib.parse import quote
 
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import diskcache
+import httpx
+import orjson
 
 
 # Configuration (can be overridden via command line or environment variables)
@@ -42,6 +47,44 @@ WORKSPACE = "your-workspace"  # Default workspace name
 REPO_SLUG = "your-repo"  # Default repository slug
 TARGET_ACCOUNT_ID = ""  # Default account ID (empty = export all comments)
 
+# Concurrency limits (kept low to stay clear of Bitbucket's rate limiting)
+MAX_CONCURRENT_REQUESTS = 10
+MAX_CONNECTIONS = 20
+
+# Items per page requested from paginated endpoints (Bitbucket's maximum)
+PAGELEN = 100
+
+# Partial response for the comments endpoint: only the fields we export,
+# plus the pagination keys fetch_paginated relies on
+COMMENT_FIELDS = ",".join([
+    "values.id",
+    "values.content.raw",
+    "values.inline.path",
+    "values.inline.to",
+    "values.created_on",
+    "values.updated_on",
+    "values.user.account_id",
+    "next",
+    "size",
+    "page",
+    "pagelen",
+])
+
+# On-disk response cache; entries are keyed by PR updated_on, so the TTL only bounds disk use
+DEFAULT_CACHE_DIR = ".bitbucket_cache"
+COMMENT_CACHE_TTL_SECONDS = 7 * 86400
+ETAG_CACHE_TTL_SECONDS = 7 * 86400
+
+# Retry policy for transient failures
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 1
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Bitbucket allows roughly 1000 API requests per hour; requests are only
+# paced once the initial burst allowance is used up
+RATE_LIMIT_REQUESTS = 1000
+RATE_LIMIT_PERIOD_SECONDS = 3600
+
 # CSV field names (ordered)
 CSV_FIELDS = [
     "pr_id",
@@ -55,141 +98,650 @@ CSV_FIELDS = [
     "updated_on",
 ]
 
+# Output formats; parquet needs the optional pyarrow dependency
+OUTPUT_FORMATS = ["csv", "parquet"]
+
+# Rows buffered per Parquet record batch (bounds memory for large exports)
+PARQUET_BATCH_ROWS = 10_000
+
+# Sidecar file (next to the CSV output) listing the PR ids already exported,
+# so an interrupted export resumes where it stopped
+CHECKPOINT_SUFFIX = ".checkpoint.jsonl"
+
+# Sidecar file (next to the CSV output) holding the start time of the last
+# completed export, used by --incremental to fetch only what changed since
+LAST_EXPORT_SUFFIX = ".last_export"
+
+# Minimum time between progress line redraws
+PROGRESS_INTERVAL_SECONDS = 0.2
+
+
+class ProgressLine:
+    """Single status line redrawn in place, throttled and only shown on a terminal."""
+    
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled and sys.stdout.isatty()
+        self._last_draw = 0.0
+        self._width = 0
+    
+    def update(self, message: str) -> None:
+        """Redraw the line, skipping updates within PROGRESS_INTERVAL_SECONDS of the last."""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self._last_draw < PROGRESS_INTERVAL_SECONDS:
+            return
+        self._last_draw = now
+        self._draw(message)
+    
+    def finish(self, message: str) -> None:
+        """Replace the line with a final message (printed plainly when not on a terminal)."""
+        if self.enabled:
+            self._draw(message)
+            print()
+        else:
+            print(message)
+    
+    def _draw(self, message: str) -> None:
+        # Pad with spaces to clear any leftover text from a longer previous message
+        print(f"\r{message.ljust(self._width)}", end="", flush=True)
+        self._width = len(message)
+
 
-def create_session(email: str, token: str) -> requests.Session:
-    """Create a requests session with retry logic and auth configured."""
-    session = requests.Session()
-    session.auth = (email, token)
+class RateLimiter:
+    """Async token bucket allowing `rate` requests per `period` seconds."""
+    
+    def __init__(self, rate: int, period: float):
+        self.rate = rate
+        self.period = period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
     
-    # Configure retries for transient failures
-    retry_strategy = Retry(
-        total=3,
-        backoff_factor=1,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["GET"],
+    async def acquire(self) -> None:
+        """Wait until a request may be sent, then consume one token."""
+        while True:
+            now = time.monotonic()
+            refill = (now - self._updated) * self.rate / self.period
+            self._tokens = min(self.rate, self._tokens + refill)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
+
+
+RATE_LIMITER = RateLimiter(RATE_LIMIT_REQUESTS, RATE_LIMIT_PERIOD_SECONDS)
+
+
+class CsvRowWriter:
+    """Write rows to a CSV file, appending to an existing export when resuming."""
+    
+    def __init__(self, path: str, append: bool = False):
+        mode = "w"
+        if append:
+            mode = "a"
+        write_header = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, mode, newline="", encoding="utf-8")
+        self.writerow = csv.writer(self._file).writerow
+        if write_header:
+            self.writerow(CSV_FIELDS)
+    
+    def flush(self) -> None:
+        """Flush written rows to disk."""
+        self._file.flush()
+    
+    def close(self) -> None:
+        """Close the underlying file."""
+        self._file.close()
+
+
+class ParquetRowWriter:
+    """Buffer rows column-wise and write them to Parquet in record batches."""
+    
+    def __init__(self, path: str):
+        # Imported lazily so CSV exports don't require pyarrow
+        import pyarrow
+        import pyarrow.parquet
+        
+        self._pa = pyarrow
+        self._schema = pyarrow.schema([
+            ("pr_id", pyarrow.int64()),
+            ("pr_title", pyarrow.string()),
+            ("pr_url", pyarrow.string()),
+            ("comment_id", pyarrow.int64()),
+            ("content", pyarrow.string()),
+            ("file_path", pyarrow.string()),
+            ("line", pyarrow.int64()),
+            ("created_on", pyarrow.string()),
+            ("updated_on", pyarrow.string()),
+        ])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema, compression="zstd")
+        self._columns: list[list[Any]] = [[] for _ in CSV_FIELDS]
+    
+    def writerow(self, row: tuple) -> None:
+        """Append a row in CSV_FIELDS order, flushing once a full batch is buffered."""
+        for column, value in zip(self._columns, row):
+            column.append(value)
+        if len(self._columns[0]) >= PARQUET_BATCH_ROWS:
+            self.flush()
+    
+    def flush(self) -> None:
+        """Write buffered rows as one record batch."""
+        if not self._columns[0]:
+            return
+        arrays = [
+            self._pa.array(column, type=field.type)
+            for column, field in zip(self._columns, self._schema)
+        ]
+        self._writer.write_batch(self._pa.RecordBatch.from_arrays(arrays, schema=self._schema))
+        self._columns = [[] for _ in CSV_FIELDS]
+    
+    def close(self) -> None:
+        """Flush remaining rows and finalize the file."""
+        self.flush()
+        self._writer.close()
+
+
+@contextlib.contextmanager
+def open_row_writer(
+    output_file: str,
+    output_format: str = "csv",
+    append: bool = False,
+) -> Iterator[CsvRowWriter | ParquetRowWriter]:
+    """Open output_file for writing rows in CSV_FIELDS order in the given format."""
+    if output_format == "parquet":
+        writer = ParquetRowWriter(output_file)
+    else:
+        writer = CsvRowWriter(output_file, append)
+    try:
+        yield writer
+    finally:
+        writer.close()
+
+
+def load_last_export(last_export_file: str) -> datetime | None:
+    """Read the start time of the last completed export (None if there is none)."""
+    if not os.path.exists(last_export_file):
+        return None
+    with open(last_export_file, encoding="utf-8") as f:
+        return datetime.fromisoformat(f.read().strip())
+
+
+def load_checkpoint(checkpoint_file: str) -> tuple[dict[str, Any] | None, set[int]]:
+    """Read an interrupted export's checkpoint.
+    
+    The first line records how the export was started (the `cutoff` for the
+    next incremental run and the `since` this one used, if any); every later line is a finished PR id.
+    Returns (None, empty set) when there is no checkpoint.
+    """
+    if not os.path.exists(checkpoint_file):
+        return None, set()
+    with open(checkpoint_file, "rb") as f:
+        lines = [line for line in f if line.strip()]
+    if not lines:
+        return None, set()
+    return orjson.loads(lines[0]), {orjson.loads(line) for line in lines[1:]}
+
+
+def load_exported_comment_ids(output_file: str) -> set[str]:
+    """Read the comment ids already present in a CSV export."""
+    if not os.path.exists(output_file):
+        return set()
+    index = CSV_FIELDS.index("comment_id")
+    with open(output_file, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)  # Header
+        return {row[index] for row in reader if len(row) > index}
+
+
+def create_session(email: str, token: str) -> httpx.AsyncClient:
+    """Create an async HTTP/2 client with auth and connection limits configured."""
+    # With an explicit transport, the client ignores its own http2/limits
+    # arguments, so both are set on the transport itself
+    transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_CONNECTIONS,
+        ),
+        # Transport-level retries cover connection failures only
+        retries=MAX_RETRIES,
     )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session.mount("https://", adapter)
-    session.mount("http://", adapter)
+    return httpx.AsyncClient(auth=(email, token), timeout=30.0, transport=transport)
+
+
+async def get_with_retry(
+    session: httpx.AsyncClient,
+    url: str,
+    headers: dict[str, str] | None = None,
+) -> httpx.Response:
+    """GET a URL, retrying 429/5xx responses and network errors with exponential backoff."""
+    for attempt in range(MAX_RETRIES + 1):
+        await RATE_LIMITER.acquire()
+        delay = BACKOFF_FACTOR * (2 ** attempt)
+        try:
+            response = await session.get(url, headers=headers)
+        except httpx.TransportError:
+            # Read timeouts, dropped connections etc.; the transport only retries connects
+            if attempt == MAX_RETRIES:
+                raise
+            await asyncio.sleep(delay)
+            continue
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            break
+        
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            delay = int(retry_after)
+        await asyncio.sleep(delay)
+    
+    # 304 answers a conditional GET and is handled by the caller
+    if response.status_code != httpx.codes.NOT_MODIFIED:
+        response.raise_for_status()
+    return response
+
+
+async def get_json(
+    session: httpx.AsyncClient,
+    url: str,
+    cache: diskcache.Cache | None = None,
+) -> dict[str, Any]:
+    """GET a URL and decode its JSON body, revalidating cached bodies by ETag."""
+    key = f"etag:{url}"
+    cached = None
+    headers = None
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            headers = {"If-None-Match": cached[0]}
+    
+    response = await get_with_retry(session, url, headers)
+    if response.status_code == httpx.codes.NOT_MODIFIED and cached is not None:
+        return orjson.loads(cached[1])
     
-    return session
+    etag = response.headers.get("ETag")
+    if cache is not None and etag:
+        cache.set(key, (etag, response.content), expire=ETAG_CACHE_TTL_SECONDS)
+    return orjson.loads(response.content)
 
 
-def fetch_paginated(
-    session: requests.Session, 
-    url: str, 
+async def fetch_paginated(
+    session: httpx.AsyncClient,
+    url: str,
     label: str = "items",
     show_progress: bool = True,
+    cache: diskcache.Cache | None = None,
+    until: Callable[[dict[str, Any]], bool] | None = None,
 ) -> list[dict[str, Any]]:
-    """Fetch all pages from a paginated Bitbucket API endpoint."""
-    results = []
-    page = 1
+    """Fetch all pages from a paginated Bitbucket API endpoint.
     
-    while url:
-        if show_progress:
-            print(f"\r  Fetching {label}... (page {page}, {len(results)} so far)", end="", flush=True)
-        
-        response = session.get(url, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        results.extend(data.get("values", []))
-        url = data.get("next")
-        page += 1
+    The first page reports the total `size`, so the remaining pages are
+    requested concurrently by page number. Endpoints that omit `size` fall
+    back to following `next` links one page at a time. When a cache is
+    given, pages are fetched with conditional GETs and unchanged pages are
+    served from it. For sorted listings, `until` stops the fetch at the
+    first item it matches; that item and everything after it are dropped.
+    """
+    first_url = httpx.URL(url)
+    progress = ProgressLine(show_progress)
+    progress.update(f"  Fetching {label}... (page 1)")
+    results: list[dict[str, Any]] = []
+    
+    def consume(values: list[dict[str, Any]]) -> bool:
+        """Add a page's values to results; return False once `until` matches."""
+        if until is None:
+            results.extend(values)
+            return True
+        for item in values:
+            if until(item):
+                return False
+            results.append(item)
+        return True
+    
+    data = await get_json(session, str(first_url), cache)
+    more = consume(data.get("values", []))
+    
+    size = data.get("size")
+    pagelen = data.get("pagelen")
+    if more and size is not None and pagelen:
+        num_pages = math.ceil(size / pagelen)
+        if num_pages > 1:
+            progress.update(f"  Fetching {label}... ({num_pages} pages)")
+        pages = await asyncio.gather(*(
+            get_json(session, str(first_url.copy_set_param("page", page)), cache)
+            for page in range(2, num_pages + 1)
+        ))
+        for page_data in pages:
+            if not consume(page_data.get("values", [])):
+                break
+    elif more:
+        # Request each next page as soon as its link is known, before the
+        # current page's values are consumed
+        pending = None
+        if data.get("next"):
+            pending = asyncio.create_task(get_json(session, data["next"], cache))
+        page = 2
+        while pending is not None:
+            progress.update(f"  Fetching {label}... (page {page}, {len(results)} so far)")
+            
+            data = await pending
+            pending = None
+            if data.get("next"):
+                pending = asyncio.create_task(get_json(session, data["next"], cache))
+            if not consume(data.get("values", [])) and pending is not None:
+                pending.cancel()
+                pending = None
+            page += 1
     
     if show_progress:
-        print(f"\r  Fetched {len(results)} {label}" + " " * 20)  # Clear line
+        progress.finish(f"  Fetched {len(results)} {label}")
     
     return results
 
 
-def get_all_prs(session: requests.Session, workspace: str, repo_slug: str) -> list[dict[str, Any]]:
-    """Fetch all pull requests (merged, open, and declined)."""
+async def get_all_prs(
+    session: httpx.AsyncClient,
+    workspace: str,
+    repo_slug: str,
+    cache: diskcache.Cache | None = None,
+    since: datetime | None = None,
+) -> list[dict[str, Any]]:
+    """Fetch all pull requests (merged, open, and declined), or only those updated after since."""
     base_url = f"https://api.bitbucket.org/2.0/repositories/{workspace}/{repo_slug}"
-    url = f"{base_url}/pullrequests?state=MERGED&state=OPEN&state=DECLINED"
-    return fetch_paginated(session, url, label="pull requests")
+    url = (
+        f"{base_url}/pullrequests?state=MERGED&state=OPEN&state=DECLINED"
+        f"&pagelen={PAGELEN}&fields=%2Bvalues.comment_count"
+    )
+    until = None
+    if since is not None:
+        # Newest first, so the scan can stop at the first PR older than the cutoff
+        url += "&q=" + quote(f"updated_on > {since.isoformat()}", safe="") + "&sort=-updated_on"
+        until = lambda pr: datetime.fromisoformat(pr["updated_on"]) <= since  # noqa: E731
+    
+    # Listing pages change rarely, so revalidate them with ETags instead of re-downloading
+    return await fetch_paginated(session, url, label="pull requests", cache=cache, until=until)
 
 
-def get_pr_comments(session: requests.Session, workspace: str, repo_slug: str, pr_id: int) -> list[dict[str, Any]]:
-    """Fetch all comments for a specific PR."""
+async def get_pr_comments(
+    session: httpx.AsyncClient,
+    workspace: str,
+    repo_slug: str,
+    pr_id: int,
+    updated_on: str | None = None,
+    cache: diskcache.Cache | None = None,
+    account_id: str | None = None,
+    since: datetime | None = None,
+) -> list[dict[str, Any]]:
+    """Fetch comments for a specific PR, optionally only those by account_id or created after since.
+    
+    Filters are applied server-side, and results are reused from the
+    cache when the PR is unchanged.
+    """
+    key = None
+    if cache is not None and updated_on:
+        # updated_on changes whenever the PR (or a comment on it) changes
+        key = f"comments:{workspace}/{repo_slug}/{pr_id}:{updated_on}"
+        if account_id:
+            key += f":{account_id}"
+        if since is not None:
+            key += f":{since.isoformat()}"
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    
     base_url = f"https://api.bitbucket.org/2.0/repositories/{workspace}/{repo_slug}"
-    url = f"{base_url}/pullrequests/{pr_id}/comments"
-    return fetch_paginated(session, url, show_progress=False)
+    url = f"{base_url}/pullrequests/{pr_id}/comments?pagelen={PAGELEN}&fields={COMMENT_FIELDS}"
+    filters = []
+    if account_id:
+        filters.append(f'user.account_id="{account_id}"')
+    if since is not None:
+        filters.append(f"created_on > {since.isoformat()}")
+    if filters:
+        url += "&q=" + quote(" AND ".join(filters), safe="")
+    comments = await fetch_paginated(session, url, show_progress=False)
+    
+    if key is not None:
+        cache.set(key, comments, expire=COMMENT_CACHE_TTL_SECONDS)
+    return comments
 
 
-def export_comments_to_csv(
-    session: requests.Session,
+async def fetch_pr_comments_async(
+    session: httpx.AsyncClient,
+    sem: asyncio.Semaphore,
+    workspace: str,
+    repo_slug: str,
+    pr_id: int,
+    updated_on: str | None = None,
+    cache: diskcache.Cache | None = None,
+    account_id: str | None = None,
+    since: datetime | None = None,
+) -> list[dict[str, Any]]:
+    """Fetch all comments for a PR while holding a slot of the shared semaphore."""
+    async with sem:
+        return await get_pr_comments(
+            session, workspace, repo_slug, pr_id, updated_on, cache, account_id, since
+        )
+
+
+async def export_comments_to_csv(
+    session: httpx.AsyncClient,
     workspace: str,
     repo_slug: str,
     output_file: str = "my_pr_comments.csv",
     account_id: str | None = None,
+    cache: diskcache.Cache | None = None,
+    output_format: str = "csv",
+    resume: bool = True,
+    incremental: bool = False,
 ) -> int:
     """
-    Export PR comments to CSV, optionally filtered by account_id.
+    Export PR comments to CSV or Parquet, optionally filtered by account_id.
+    
+    Comments for all PRs are fetched concurrently, bounded by
+    MAX_CONCURRENT_REQUESTS in-flight PRs. CSV exports record each finished
+    PR in a checkpoint file; if a run is interrupted, the next one skips
+    those PRs and appends to the existing CSV, using the interrupted run's
+    start time and cutoff. Completed CSV exports also record their start
+    time, so an incremental run only fetches comments created since then and
+    appends them. Comments already in the CSV are never written twice, so
+    edits to exported comments are not synced.
     
     Args:
-        session: Authenticated requests session
+        session: Authenticated async HTTP client
         workspace: Bitbucket workspace name
         repo_slug: Repository slug
-        output_file: Path to output CSV file
+        output_file: Path to output file
         account_id: Filter to only include comments from this user (None = all comments)
+        cache: On-disk cache for PR listing pages and per-PR comments (None = always fetch)
+        output_format: "csv" or "parquet"
+        resume: Continue an interrupted CSV export from its checkpoint (False = start over)
+        incremental: Append only comments created since the last completed CSV export
+            (falls back to a full export when there is none)
         
     Returns:
         Number of comments exported
     """
-    all_comments = []
+    exported_count = 0
     pr_web_url = f"https://bitbucket.org/{workspace}/{repo_slug}/pull-requests"
     
-    print("Fetching pull requests...")
-    prs = get_all_prs(session, workspace, repo_slug)
+    # Parquet files can't be appended to, so only CSV exports are resumable/incremental
+    checkpoint_file = None
+    last_export_file = None
+    processed_pr_ids: set[int] = set()
+    since = None
+    resuming = False
+    cutoff = None
+    if output_format == "csv":
+        checkpoint_file = f"{output_file}{CHECKPOINT_SUFFIX}"
+        last_export_file = f"{output_file}{LAST_EXPORT_SUFFIX}"
+        header = None
+        if resume and os.path.exists(output_file):
+            header, processed_pr_ids = load_checkpoint(checkpoint_file)
+        if header is not None:
+            # Carry on the interrupted run as it was started; a resumed full
+            # run stays full even with --incremental
+            resuming = True
+            if header["cutoff"]:
+                cutoff = datetime.fromisoformat(header["cutoff"])
+            if header["since"]:
+                since = datetime.fromisoformat(header["since"])
+        elif incremental and os.path.exists(output_file):
+            since = load_last_export(last_export_file)
+    
+    append = resuming or since is not None
+    exported_comment_ids: set[str] = set()
+    if append:
+        exported_comment_ids = load_exported_comment_ids(output_file)
+    elif last_export_file and os.path.exists(last_export_file):
+        # The output is about to be truncated, so it no longer reflects that export
+        os.remove(last_export_file)
+    
+    if since is not None:
+        print(f"Fetching pull requests updated since {since.isoformat()}...")
+    else:
+        print("Fetching pull requests...")
+    prs = await get_all_prs(session, workspace, repo_slug, cache, since)
+    found_prs = len(prs)
+    if not resuming:
+        # Bitbucket's clock, not ours: any comment posted before the newest PR
+        # update is in this listing, anything later bumps its PR past the cutoff
+        cutoff = max(
+            (datetime.fromisoformat(pr["updated_on"]) for pr in prs if pr.get("updated_on")),
+            default=since,
+        )
+    # No point requesting the comments of a PR known to have none (a missing count is fetched)
+    prs = [pr for pr in prs if pr.get("comment_count") != 0]
+    
+    if resuming:
+        print(f"Resuming: skipping {len(processed_pr_ids)} PRs already in {output_file}")
+        prs = [pr for pr in prs if pr["id"] not in processed_pr_ids]
+    
     total_prs = len(prs)
-    print(f"Found {total_prs} PRs to scan\n")
+    print(f"Found {found_prs} PRs, {total_prs} with comments to scan\n")
     
-    for idx, pr in enumerate(prs, 1):
-        pr_id = pr["id"]
-        pr_title = pr["title"]
-        
-        # Progress indicator
-        print(f"\r[{idx}/{total_prs}] Scanning PR #{pr_id}: {pr_title[:50]}...", end="", flush=True)
-        
-        comments = get_pr_comments(session, workspace, repo_slug, pr_id)
+    sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    progress = ProgressLine()
+    
+    async def fetch_for_pr(pr: dict[str, Any]) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+        comments = await fetch_pr_comments_async(
+            session, sem, workspace, repo_slug, pr["id"], pr.get("updated_on"), cache, account_id, since
+        )
+        return pr, comments
+    
+    # Rows are written as each PR completes, so an interrupted run keeps what it fetched
+    with contextlib.ExitStack() as stack:
+        writer = stack.enter_context(open_row_writer(output_file, output_format, append))
+        checkpoint = None
+        if checkpoint_file and resuming:
+            checkpoint = stack.enter_context(open(checkpoint_file, "ab"))
+        elif checkpoint_file:
+            checkpoint = stack.enter_context(open(checkpoint_file, "wb"))
+            header = {"cutoff": None, "since": None}
+            if cutoff is not None:
+                header["cutoff"] = cutoff.isoformat()
+            if since is not None:
+                header["since"] = since.isoformat()
+            checkpoint.write(orjson.dumps(header) + b"\n")
+            checkpoint.flush()
         
-        for comment in comments:
-            # Filter by account_id if provided
-            if account_id:
-                author_id = comment.get("user", {}).get("account_id", "")
-                if author_id != account_id:
+        for done, next_pr in enumerate(asyncio.as_completed([fetch_for_pr(pr) for pr in prs]), 1):
+            pr, comments = await next_pr
+            pr_id = pr["id"]
+            pr_title = pr["title"]
+            pr_url = f"{pr_web_url}/{pr_id}"
+            
+            progress.update(f"[{done}/{total_prs}] Scanned PR #{pr_id}: {pr_title[:50]}...")
+            
+            for comment in comments:
+                # account_id is filtered server-side; double-check when assertions are on
+                assert not account_id or comment.get("user", {}).get("account_id") == account_id
+                
+                # Appended runs can overlap what is already exported (a comment posted while
+                # the last run was in progress, or a PR interrupted mid-write); keep the first row
+                comment_id = comment.get("id")
+                if exported_comment_ids and str(comment_id) in exported_comment_ids:
                     continue
+                
+                # Plain tuples in CSV_FIELDS order; avoids a dict and chained lookups per row
+                content = comment.get("content")
+                inline = comment.get("inline")
+                raw = ""
+                if content:
+                    raw = content.get("raw", "")
+                file_path = "General comment"
+                line = None  # Written as an empty CSV field / Parquet null
+                if inline:
+                    file_path = inline.get("path", file_path)
+                    line = inline.get("to")
+                writer.writerow((
+                    pr_id,
+                    pr_title,
+                    pr_url,
+                    comment_id,
+                    raw,
+                    file_path,
+                    line,
+                    comment.get("created_on", ""),
+                    comment.get("updated_on", ""),
+                ))
+                exported_count += 1
             
-            all_comments.append({
-                "pr_id": pr_id,
-                "pr_title": pr_title,
-                "pr_url": f"{pr_web_url}/{pr_id}",
-                "comment_id": comment.get("id"),
-                "content": comment.get("content", {}).get("raw", ""),
-                "file_path": comment.get("inline", {}).get("path", "General comment"),
-                "line": comment.get("inline", {}).get("to", ""),
-                "created_on": comment.get("created_on", ""),
-                "updated_on": comment.get("updated_on", ""),
-            })
-        
-        # Small delay to be nice to the API
-        time.sleep(0.1)
+            if checkpoint is not None:
+                # Rows must be on disk before the PR is recorded as done
+                writer.flush()
+                checkpoint.write(orjson.dumps(pr_id) + b"\n")
+                checkpoint.flush()
     
-    print("\n")  # New line after progress
+    # Finished cleanly; the next run starts a fresh export (or continues from here)
+    if checkpoint_file and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+    if last_export_file and cutoff is not None:
+        with open(last_export_file, "w", encoding="utf-8") as f:
+            f.write(cutoff.isoformat())
     
-    # Write to CSV
-    with open(output_file, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
-        writer.writeheader()
-        writer.writerows(all_comments)
-    
-    print(f"Exported {len(all_comments)} comments to {output_file}")
-    return len(all_comments)
+    progress.finish(f"[{total_prs}/{total_prs}] Scanned all PRs")
+    print()
+    print(f"Exported {exported_count} comments to {output_file}")
+    return exported_count
+
+
+async def run_export(
+    email: str,
+    token: str,
+    workspace: str,
+    repo_slug: str,
+    output_file: str,
+    account_id: str | None,
+    cache_dir: str | None = DEFAULT_CACHE_DIR,
+    output_format: str = "csv",
+    resume: bool = True,
+    incremental: bool = False,
+) -> int:
+    """Open the HTTP client (and response cache, if enabled) and run the export inside it."""
+    cache = None
+    if cache_dir:
+        cache = diskcache.Cache(cache_dir)
+    try:
+        async with create_session(email, token) as session:
+            return await export_comments_to_csv(
+                session,
+                workspace,
+                repo_slug,
+                output_file,
+                account_id,
+                cache,
+                output_format,
+                resume,
+                incremental,
+            )
+    finally:
+        if cache is not None:
+            cache.close()
 
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Export your Bitbucket PR comments to CSV",
+        description="Export your Bitbucket PR comments to CSV or Parquet",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog=__doc__,
     )
@@ -215,14 +767,39 @@ def main():
     )
     parser.add_argument(
         "-o", "--output",
-        default="my_pr_comments.csv",
-        help="Output CSV file path (default: my_pr_comments.csv)",
+        help="Output file path (default: my_pr_comments.csv, or .parquet with --format parquet)",
+    )
+    parser.add_argument(
+        "-f", "--format",
+        choices=OUTPUT_FORMATS,
+        default="csv",
+        help="Output format (default: csv). Parquet output requires pyarrow.",
     )
     parser.add_argument(
         "-a", "--account-id",
         default=os.environ.get("BITBUCKET_ACCOUNT_ID", TARGET_ACCOUNT_ID),
         help="Filter comments by account ID (or set BITBUCKET_ACCOUNT_ID env var). Set to empty string to export all comments. Default: export all comments.",
     )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory for the on-disk response cache (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Append only comments created since the last completed CSV export to the output file (edits are not synced)",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the checkpoint of an interrupted CSV export and start over",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the response cache and always fetch from the API",
+    )
     
     args = parser.parse_args()
     
@@ -238,21 +815,39 @@ def main():
         print("Provide --workspace and --repo, or set BITBUCKET_WORKSPACE and BITBUCKET_REPO_SLUG environment variables.", file=sys.stderr)
         sys.exit(1)
     
+    if args.incremental and args.format != "csv":
+        print("Error: --incremental is only supported for CSV output.", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("Error: Parquet output requires pyarrow. Install with: pip install pyarrow", file=sys.stderr)
+            sys.exit(1)
+    
+    output_file = args.output
+    if not output_file:
+        output_file = f"my_pr_comments.{args.format}"
+    
     # Handle empty account_id (export all comments)
     account_id = args.account_id if args.account_id else None
     
     # Create session and export
-    session = create_session(args.email, args.token)
-    
     try:
-        export_comments_to_csv(
-            session, 
-            args.workspace, 
-            args.repo, 
-            args.output, 
-            account_id
-        )
-    except requests.exceptions.HTTPError as e:
+        asyncio.run(run_export(
+            args.email,
+            args.token,
+            args.workspace,
+            args.repo,
+            output_file,
+            account_id,
+            None if args.no_cache else args.cache_dir,
+            args.format,
+            not args.restart,
+            args.incremental,
+        ))
+    except httpx.HTTPStatusError as e:
         if e.response.status_code == 401:
             print("Error: Authentication failed. Check your email and API token.", file=sys.stderr)
         elif e.response.status_code == 403:
@@ -262,7 +857,7 @@ def main():
         else:
             print(f"Error: API request failed: {e}", file=sys.stderr)
         sys.exit(1)
-    except requests.exceptions.RequestException as e:
+    except httpx.RequestError as e:
         print(f"Error: Network error: {e}", file=sys.stderr)
         sys.exit(1)
 